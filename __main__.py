@@ -1,8 +1,10 @@
 import modules_inst
 
-# Install all required modules if they are not installed
-modules_inst.install('PyQt5', 'pyqtgraph')
+# Calculations of the error sweep are run in separate processes which import this module again
+if __name__ == '__main__':
+    # Install all required modules if they are not installed
+    modules_inst.install('PyQt5', 'pyqtgraph')
 
-from main import main
+    from main import main
 
-main()
+    main()
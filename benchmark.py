@@ -0,0 +1,59 @@
+# from fractions import Fraction as Rational
+from decimal import Decimal as Rational
+
+import utils
+from given import x_0_DEFAULT, y_0_DEFAULT, X_DEFAULT
+from mvc_model import breakpoints_between, STEPPERS, GRAPH_NAMES
+
+STEPS_NUMBERS = [10, 20, 40, 80, 160]
+HEADER = '{:<32} {:>6} {:>10} {:>12} {:>14}'
+ROW = '{:<32} {:>6} {:>10} {:>12.3e} {:>14.3e}'
+
+
+class _CountedFunction:
+    """
+    Function f(x, y) counting the number of its evaluations.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.count = 0
+
+    def __call__(self, x, y):
+        self.count += 1
+        return self.func(x, y)
+
+
+def benchmark(x_0, y_0, X, steps_numbers=STEPS_NUMBERS):
+    """
+    Compare max errors of all the methods and number of f evaluations needed for them.
+    :param x_0: x value of IVP
+    :param y_0: y value for the corresponding x_0 value
+    :param X: Last x value of calculating range of functions
+    :param steps_numbers: Numbers of steps to calculate the methods with
+    :return: List of tuples: method type, number of steps, number of f evaluations, max error
+    """
+    counted_f = _CountedFunction(utils.f)
+    utils.f = counted_f
+    breakpoints = breakpoints_between(x_0, X)
+    results = []
+    try:
+        for method_type, step_func in STEPPERS.items():
+            for n in steps_numbers:
+                counted_f.count = 0
+                step = Rational(str((X - x_0) / n))
+                max_err = utils.error_metrics(step_func, breakpoints, x_0, y_0, X, step).max
+                results.append((method_type, n, counted_f.count, max_err))
+    finally:
+        utils.f = counted_f.func
+    return results
+
+
+def main():
+    print(HEADER.format('method', 'steps', 'f evals', 'max error', 'error * evals'))
+    for method_type, n, evaluations, max_err in benchmark(
+            Rational(x_0_DEFAULT), Rational(y_0_DEFAULT), Rational(X_DEFAULT)):
+        print(ROW.format(GRAPH_NAMES[method_type], n, evaluations, max_err, max_err * evaluations))
+
+
+if __name__ == '__main__':
+    main()
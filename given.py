@@ -6,6 +6,8 @@
 # from fractions import Fraction as Rational
 from decimal import Decimal as Rational
 
+from expressions import compile_function
+
 e = Rational('2.7182818284590452353602874713')  # 28 first digits after point (Wikipedia)
 
 # IVP constants - Variant 4
@@ -16,6 +18,15 @@ X_DEFAULT = '10.0'
 STEP_DEFAULT = '0.01'
 _BREAKPOINTS = ['0.0']
 
+# Optional expression strings overriding the functions below, parsed and compiled once at import
+# (None - the functions are used as is). Allowed: x, y, c, e, numbers, + - * / **, exp, log, sqrt, sin, cos, tan, abs
+# WARNING: sin, cos and tan are calculated through float, so they have about 16 significant digits instead of 28
+# Example: F_EXPRESSION = '1 + y * (2 * x - 1) / x ** 2'
+# ATTENTION! Y_EXPRESSION (of x and c) is used only together with C_EXPRESSION (of x and y)!
+F_EXPRESSION = None
+Y_EXPRESSION = None
+C_EXPRESSION = None
+
 
 def get_breakpoints():
     """
@@ -63,3 +74,20 @@ def y_ivp(x):
     :return: y(x) value with given x value
     """
     return x ** 2
+
+
+if F_EXPRESSION:
+    f = compile_function(F_EXPRESSION, ('x', 'y'), {'e': e})
+
+if Y_EXPRESSION and C_EXPRESSION:
+    y = compile_function(Y_EXPRESSION, ('x', 'c'), {'e': e})
+    c = compile_function(C_EXPRESSION, ('x', 'y'), {'e': e})
+    _c_ivp = c(Rational(x_0_DEFAULT), Rational(y_0_DEFAULT))
+
+    def y_ivp(x):
+        """
+        Function y(x) of differential equation given by Y_EXPRESSION with solved IVP for default x_0 and y_0.
+        :param x: x value
+        :return: y(x) value with given x value
+        """
+        return y(x, _c_ivp)
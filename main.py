@@ -8,12 +8,14 @@ import mvc_view
 def main():
     app = QtGui.QApplication([])
     model = mvc_model.Model()
-    controller = mvc_controller.Controller(model)
+    sweep_model = mvc_model.SweepModel()
+    controller = mvc_controller.Controller(model, sweep_model)
     view = mvc_view.View(model, controller)
 
     controller.view = view
     view.show()
     app.exec()
+    sweep_model.stop()
 
 
 if __name__ == '__main__':
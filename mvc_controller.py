@@ -4,11 +4,13 @@ import re
 from decimal import Decimal as Rational
 
 from given import get_breakpoints
-from mvc_view import View, EL_NAMES
+from mvc_model import STEPPERS, GRAPH_NAMES, SWEEP_PARAMETERS
+from mvc_view import View, SweepView, EL_NAMES, SWEEP_EL_NAMES
 from utils import FLOAT_REGEXP, PlotType, ErrorPlotType
 
 WHITE_CODE = 'ffffff'
 SCARLET_CODE = 'f6989d'
+INT_REGEXP = r'^[1-9][0-9]*$'
 BREAKPOINTS = get_breakpoints()
 
 
@@ -16,12 +18,15 @@ class Controller:
     """
     Controller of user actions of the project for numerical methods of differential equation solving.
     """
-    def __init__(self, model):
+    def __init__(self, model, sweep_model=None):
         """
         :param model: Model module of MVC
+        :param sweep_model: Model of the error sweep; if None - sweep is not available
         """
         self.model = model
+        self.sweep_model = sweep_model
         self.view = None
+        self.sweep_view = None
 
     def _btn_pressed(self, plot_type, error_type=ErrorPlotType.by_x):
         """
@@ -65,6 +70,77 @@ class Controller:
         """
         self._btn_pressed(PlotType.runge_kutta)
 
+    def runge_kutta_3_8_btn_pressed(self):
+        """
+        Action of button 'Draw Runge-Kutta 3/8-rule method' pressed.
+        """
+        self._btn_pressed(PlotType.runge_kutta_3_8)
+
+    def dormand_prince_btn_pressed(self):
+        """
+        Action of button 'Draw Dormand-Prince method' pressed.
+        """
+        self._btn_pressed(PlotType.dormand_prince)
+
+    def adams_bashforth_btn_pressed(self):
+        """
+        Action of button 'Draw Adams-Bashforth method' pressed.
+        """
+        self._btn_pressed(PlotType.adams_bashforth)
+
+    def adams_moulton_btn_pressed(self):
+        """
+        Action of button 'Draw Adams-Bashforth-Moulton method' pressed.
+        """
+        self._btn_pressed(PlotType.adams_moulton)
+
+    def compare_btn_pressed(self):
+        """
+        Action of button 'Compare all methods' pressed.
+        """
+        self._btn_pressed(tuple(STEPPERS))
+
+    def sweep_btn_pressed(self):
+        """
+        Action of button 'Error sweep' pressed.
+        """
+        if not self.sweep_model:
+            return
+        if not self.sweep_view:
+            self.sweep_view = SweepView(
+                self.sweep_model, self,
+                [GRAPH_NAMES[method_type] for method_type in STEPPERS], SWEEP_PARAMETERS
+            )
+        self.sweep_view.show()
+        self.sweep_view.raise_()
+
+    def sweep_run_btn_pressed(self):
+        """
+        Action of button 'Run sweep' pressed.
+        """
+        inp = [self.view.elements[s].text() for s in EL_NAMES[6:9]]
+        sweep_inp = [self.sweep_view.elements[s].text() for s in SWEEP_EL_NAMES[6:13:2]]
+
+        # Check inputs for correctness
+        if not all(re.match(FLOAT_REGEXP, s) for s in inp + sweep_inp[:2]) \
+                or not all(re.match(INT_REGEXP, s) for s in sweep_inp[2:]) \
+                or not self.sweep_model.fits(int(sweep_inp[2]), int(sweep_inp[3])):
+            return
+
+        inp = [Rational(x) for x in inp]
+        method_type = list(STEPPERS)[self.sweep_view.elements[SWEEP_EL_NAMES[2]].currentIndex()]
+        parameter = SWEEP_PARAMETERS[self.sweep_view.elements[SWEEP_EL_NAMES[4]].currentIndex()]
+        self.sweep_model.update_inputs(
+            method_type, parameter, inp[0], inp[1], inp[2],
+            Rational(sweep_inp[0]), Rational(sweep_inp[1]), int(sweep_inp[2]), int(sweep_inp[3])
+        )
+
+    def sweep_refine_btn_pressed(self):
+        """
+        Action of button 'Refine grid' pressed.
+        """
+        self.sweep_model.refine()
+
     def error_btn_pressed(self):
         """
         Action of button 'Change error graph' pressed.
@@ -1,37 +1,116 @@
+# from fractions import Fraction as Rational
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal as Rational
+
 from given import get_breakpoints
-from utils import exact, euler, euler_improved, runge_kutta, error_between, max_errors, ErrorPlotType, PlotType
+from utils import error_between, ErrorAccumulator, compare_max_errors, error_metrics, segments, solve_together, \
+    euler_step, euler_improved_step, runge_kutta_step, runge_kutta_3_8_step, dormand_prince_step, \
+    adams_bashforth_step, adams_moulton_step, ErrorPlotType, PlotType
 
-METHODS = {
-    PlotType.exact: exact,
-    PlotType.euler: euler,
-    PlotType.impr_euler: euler_improved,
-    PlotType.runge_kutta: runge_kutta
+STEPPERS = {
+    PlotType.euler: euler_step,
+    PlotType.impr_euler: euler_improved_step,
+    PlotType.runge_kutta: runge_kutta_step,
+    PlotType.runge_kutta_3_8: runge_kutta_3_8_step,
+    PlotType.dormand_prince: dormand_prince_step,
+    PlotType.adams_bashforth: adams_bashforth_step,
+    PlotType.adams_moulton: adams_moulton_step
 }
 GRAPH_NAMES = {
     PlotType.exact: 'Exact solution',
     PlotType.euler: 'Euler\'s method',
     PlotType.impr_euler: 'Improved Euler\'s method',
     PlotType.runge_kutta: 'Runge-Kutta method',
+    PlotType.runge_kutta_3_8: 'Runge-Kutta 3/8-rule method',
+    PlotType.dormand_prince: 'Dormand-Prince method',
+    PlotType.adams_bashforth: 'Adams-Bashforth method',
+    PlotType.adams_moulton: 'Adams-Bashforth-Moulton method',
     ErrorPlotType.by_x: 'Difference with the exact solution',
     ErrorPlotType.step_dependence: 'Maximum error for different step sizes'
 }
+COMPARISON_NAME = '{} ({})'
+SWEEP_PARAMETERS = ('x_0', 'y_0')
+SWEEP_TILE_SIZE = 10
+SWEEP_MAX_CELLS = 10000
+
+
+def breakpoints_between(x_0, X):
+    """
+    Breakpoints of the given function lying strictly between x_0 and X.
+    :param x_0: First x value of the range
+    :param X: Last x value of the range
+    :return: List of breakpoints' Rational x values
+    """
+    return [bkpt for bkpt in get_breakpoints() if x_0 < bkpt < X]
+
+
+def _sweep_tile(method_type, X, cells):
+    """
+    Calculate max errors of the method for the part of sweep grid (it is run in a separate process).
+    :param method_type: Enumerable of the method's graph type
+    :param X: X parameter
+    :param cells: List of tuples: x_0, y_0, number of steps
+    :return: List of tuples: cell, max error (None if it cannot be calculated)
+    """
+    results = []
+    for x_0, y_0, n in cells:
+        try:
+            step = Rational(str((X - x_0) / n))
+            max_err = error_metrics(STEPPERS[method_type], breakpoints_between(x_0, X), x_0, y_0, X, step).max
+        except ArithmeticError:
+            max_err = None
+        results.append(((x_0, y_0, n), max_err))
+    return results
+
+
+class Observable:
+    """
+    Model which notifies its observers about the changes.
+    """
+    def __init__(self):
+        self._observers = []
+
+    def add_observer(self, observer):
+        """
+        Add new observer of changes in model to the notify list.
+        WARNING: It should have an attribute 'model_has_changed()'.
+        :param observer: New observer to be added
+        """
+        assert hasattr(observer, 'model_has_changed')
+        self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        """
+        Remove an observer from the notify list.
+        :param observer: Observer to be removed
+        """
+        self._observers.remove(observer)
+
+    def _notify_observers(self):
+        """
+        Send notification to all the subscribers that the model has changed.
+        """
+        for o in self._observers:
+            o.model_has_changed()
 
 
-class Model:
+class Model(Observable):
     """
     Logical model of the project for numerical methods of differential equation solving.
     """
     def __init__(self):
+        super().__init__()
         self._x_0 = None
         self._y_0 = None
         self._X = None
         self._step = None
         self._exact_plot = None
-        self._method_plot = None
-        self._method_type = PlotType.euler
-        self._error_plot = None
+        self._method_plots = []
+        self._method_types = (PlotType.euler,)
+        self._error_plots = []
+        self._error_metrics = []
         self.error_type = ErrorPlotType.by_x
-        self._observers = []
 
     @property
     def exact_plot(self):
@@ -41,16 +120,39 @@ class Model:
 
     @property
     def method_plot(self):
-        return self._method_plot
+        if not self._method_plots:
+            return None
+        return self._method_plots[0]
+
+    @property
+    def method_plots(self):
+        return self._method_plots
 
     @property
     def error_plot(self):
-        return self._error_plot
+        if not self._error_plots:
+            return None
+        return self._error_plots[0]
+
+    @property
+    def error_plots(self):
+        return self._error_plots
+
+    @property
+    def error_metrics(self):
+        if not self._error_metrics:
+            return None
+        return self._error_metrics[0]
+
+    @property
+    def methods_error_metrics(self):
+        return self._error_metrics
 
     def update_inputs(self, method_type, error_type, x_0, y_0, X, step):
         """
         Change the state of the model by changing all the parameters of it.
-        :param method_type: Enumerable of graph type to be shown; if None - previous to be used
+        :param method_type: Enumerable of graph type to be shown or tuple of them to be compared;
+                            if None - previous to be used
         :param error_type: Enumerable of error graph type to be shown; if None - previous to be used
         :param x_0: x_0 parameter
         :param y_0: y_0 parameter
@@ -66,8 +168,9 @@ class Model:
         changed |= self._step != step
         self._step = step
         if method_type:
-            changed |= self._method_type != method_type
-            self._method_type = method_type
+            method_types = method_type if isinstance(method_type, tuple) else (method_type,)
+            changed |= self._method_types != method_types
+            self._method_types = method_types
         if error_type:
             changed |= self.error_type != error_type
             self.error_type = error_type
@@ -80,87 +183,257 @@ class Model:
         Make empty all plot data.
         """
         self._exact_plot = [[], [], '']
-        self._method_plot = [[], [], '']
-        self._error_plot = [[], [], '']
-
-    def add_observer(self, observer):
-        """
-        Add new observer of changes in model to the notify list.
-        WARNING: It should have an attribute 'model_has_changed()'.
-        :param observer: New observer to be added
-        """
-        assert hasattr(observer, 'model_has_changed')
-        self._observers.append(observer)
-
-    def remove_observer(self, observer):
-        """
-        Remove an observer from the notify list.
-        :param observer: Observer to be removed
-        """
-        self._observers.remove(observer)
-
-    def _notify_observers(self):
-        """
-        Send notification to all the subscribers that the model has changed.
-        """
-        for o in self._observers:
-            o.model_has_changed()
+        self._method_plots = [[[], [], ''] for _ in self._method_types]
+        self._error_plots = [[[], [], ''] for _ in self._method_types]
 
     def _calculate_functions(self):
         """
         Refresh functions dictionary according to the values x_0, y_0, X and step.
         """
-        breakpoints = get_breakpoints()
-        i = 0
-        while i < len(breakpoints):
-            if not self._x_0 < breakpoints[i] < self._X:
-                breakpoints = breakpoints[:i] + breakpoints[i + 1:]
-            else:
-                i += 1
+        breakpoints = breakpoints_between(self._x_0, self._X)
 
         x_0 = self._x_0
         y_0 = self._y_0
         X = self._X
         step = self._step
-        last_break = x_0
 
         self._clear_data()
+        steppers = [STEPPERS[method_type] for method_type in self._method_types]
+        accumulators = [ErrorAccumulator() for _ in steppers]
 
-        # Calculating parts of the function between the breakpoints
-        for bkpt in breakpoints:
-            exact_sol = METHODS[PlotType.exact](x_0, y_0, last_break, bkpt - step, step)
-            self._exact_plot[0] += exact_sol[0]
-            self._exact_plot[1] += exact_sol[1]
-
-            method_sol = METHODS[self._method_type](x_0, y_0, last_break, bkpt - step, step)
-            self._method_plot[0] += method_sol[0]
-            self._method_plot[1] += method_sol[1]
-
-            last_break = bkpt + step
-
-        # Calculation of part after the last breakpoint
-        exact_sol = METHODS[PlotType.exact](x_0, y_0, last_break, X, step)
-        self._exact_plot[0] += exact_sol[0]
-        self._exact_plot[1] += exact_sol[1]
-
-        method_sol = METHODS[self._method_type](x_0, y_0, last_break, X, step)
-        self._method_plot[0] += method_sol[0]
-        self._method_plot[1] += method_sol[1]
-
-        # Calculating error of method's solution comparably to the exact solution
-        if self.error_type is ErrorPlotType.by_x:
-            self._error_plot[0] = self._exact_plot[0].copy()
-            self._error_plot[1] = error_between(self._exact_plot[1], self._method_plot[1])
-        elif self.error_type is ErrorPlotType.step_dependence:
-            max_errors_plot = max_errors(
-                METHODS[PlotType.exact],
-                METHODS[self._method_type],
+        # Calculating parts of the functions between the breakpoints on the shared grid
+        # and error metrics of methods' solutions comparably to the exact solution
+        for start, end in segments(breakpoints, x_0, X, step):
+            xs, exact_ys, methods_ys = solve_together(steppers, x_0, y_0, start, end, step)
+            self._exact_plot[0] += xs
+            self._exact_plot[1] += exact_ys
+            for method_plot, error_plot, accumulator, ys in zip(
+                    self._method_plots, self._error_plots, accumulators, methods_ys):
+                method_plot[0] += xs
+                method_plot[1] += ys
+                errors = error_between(exact_ys, ys)
+                accumulator.start_part(start, end)
+                for x, err in zip(xs, errors):
+                    accumulator.add(x, err)
+                if self.error_type is ErrorPlotType.by_x:
+                    error_plot[0] += xs
+                    error_plot[1] += errors
+        self._error_metrics = [accumulator.result(step) for accumulator in accumulators]
+
+        if self.error_type is ErrorPlotType.step_dependence:
+            ns, methods_max_errors = compare_max_errors(
+                steppers,
                 breakpoints,
                 x_0, y_0, X,  # TODO change max_steps_number
             )
-            self._error_plot[0] = max_errors_plot[0]
-            self._error_plot[1] = max_errors_plot[1]
+            for error_plot, max_errors_values in zip(self._error_plots, methods_max_errors):
+                error_plot[0] = ns
+                error_plot[1] = max_errors_values
 
         self._exact_plot[2] = GRAPH_NAMES[PlotType.exact]
-        self._method_plot[2] = GRAPH_NAMES[self._method_type]
-        self._error_plot[2] = GRAPH_NAMES[self.error_type]
+        for method_type, method_plot, error_plot in zip(self._method_types, self._method_plots, self._error_plots):
+            method_plot[2] = GRAPH_NAMES[method_type]
+            error_plot[2] = GRAPH_NAMES[self.error_type]
+            if len(self._method_types) > 1:
+                error_plot[2] = COMPARISON_NAME.format(GRAPH_NAMES[self.error_type], GRAPH_NAMES[method_type])
+
+
+class SweepModel(Observable):
+    """
+    Model of the maximum error of a method over the grid of (number of steps, x_0) or (number of steps, y_0).
+    Cells are calculated in parallel processes by tiles and cached, so the refined grid reuses the finished cells.
+    """
+    def __init__(self):
+        super().__init__()
+        self._method_type = PlotType.euler
+        self._parameter = SWEEP_PARAMETERS[0]
+        self._x_0 = None
+        self._y_0 = None
+        self._X = None
+        self._values = []
+        self._ns = []
+        self._cache = {}
+        self._pending = {}
+        self._pending_keys = set()
+        self._executor = None
+
+    @property
+    def parameter(self):
+        return self._parameter
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def ns(self):
+        return self._ns
+
+    @property
+    def errors(self):
+        """
+        Table of max errors: row for each parameter value, column for each number of steps;
+        None if the cell is not calculated yet or cannot be calculated.
+        """
+        return [[self._cache.get(self._key(cell)) for cell in row] for row in self._cells()]
+
+    @property
+    def progress(self):
+        """
+        Tuple: number of calculated cells, number of all cells of the grid.
+        """
+        cells = [cell for row in self._cells() for cell in row]
+        return sum(self._key(cell) in self._cache for cell in cells), len(cells)
+
+    def update_inputs(self, method_type, parameter, x_0, y_0, X, start, end, resolution, max_steps_number):
+        """
+        Change the grid of the sweep and start calculation of the cells which are not calculated yet.
+        :param method_type: Enumerable of the method's graph type
+        :param parameter: Name of the swept parameter from SWEEP_PARAMETERS
+        :param x_0: x_0 parameter (if it is not swept)
+        :param y_0: y_0 parameter (if it is not swept)
+        :param X: X parameter
+        :param start: First value of the swept parameter
+        :param end: Last value of the swept parameter
+        :param resolution: Number of values of the swept parameter
+        :param max_steps_number: Number of steps for the very last column
+        """
+        assert parameter in SWEEP_PARAMETERS
+        assert self.fits(resolution, max_steps_number)
+        self._method_type = method_type
+        self._parameter = parameter
+        self._x_0 = x_0
+        self._y_0 = y_0
+        self._X = X
+        if resolution > 1:
+            self._values = [start + (end - start) * i / (resolution - 1) for i in range(resolution)]
+        else:
+            self._values = [start]
+        self._ns = list(range(1, max_steps_number + 1))
+        self._cancel_outdated()
+        self._submit()
+        self._notify_observers()
+
+    @staticmethod
+    def fits(resolution, max_steps_number):
+        """
+        Check if the grid of the given size is allowed to be calculated.
+        :param resolution: Number of values of the swept parameter
+        :param max_steps_number: Number of steps for the very last column
+        :return: True if the grid has no more than SWEEP_MAX_CELLS cells
+        """
+        return resolution * max_steps_number <= SWEEP_MAX_CELLS
+
+    def refine(self):
+        """
+        Make the grid twice denser by the parameter and twice longer by the number of steps keeping the old cells.
+        If the refined grid is too big - nothing is done.
+        """
+        if not self._values or not self.fits(2 * len(self._values) - 1, 2 * len(self._ns)):
+            return
+        self.update_inputs(
+            self._method_type, self._parameter, self._x_0, self._y_0, self._X,
+            self._values[0], self._values[-1], 2 * len(self._values) - 1, 2 * len(self._ns)
+        )
+
+    def collect(self):
+        """
+        Put the results of the finished tiles into the cache and notify the observers if there are some.
+        """
+        done = [future for future in self._pending if future.done()]
+        for future in done:
+            executor, keys = self._pending.pop(future)
+            self._pending_keys.difference_update(keys)
+            if future.cancelled():
+                continue
+
+            # Failed tiles must not raise inside the GUI timer: their cells are marked as not calculable
+            exception = future.exception()
+            if exception is not None:
+                for key in keys:
+                    self._cache[key] = None
+                if isinstance(exception, BrokenProcessPool) and executor is self._executor:
+                    self._shutdown_executor()
+                continue
+
+            for key, (_, max_err) in zip(keys, future.result()):
+                self._cache[key] = max_err
+        if done:
+            self._notify_observers()
+
+    def stop(self):
+        """
+        Cancel calculation of the tiles which are not started yet and stop the worker processes.
+        """
+        for future in self._pending:
+            future.cancel()
+        self._shutdown_executor()
+        self._pending.clear()
+        self._pending_keys.clear()
+
+    def _cells(self):
+        """
+        Cells of the current grid.
+        :return: List of rows (for each parameter value) of tuples: x_0, y_0, number of steps
+        """
+        if self._parameter == 'x_0':
+            return [[(value, self._y_0, n) for n in self._ns] for value in self._values]
+        return [[(self._x_0, value, n) for n in self._ns] for value in self._values]
+
+    def _key(self, cell):
+        """
+        Key of the cell in the cache.
+        """
+        return (self._method_type, self._X) + cell
+
+    def _cancel_outdated(self):
+        """
+        Cancel calculation of the tiles which have no cells on the current grid.
+        """
+        keys = {self._key(cell) for row in self._cells() for cell in row}
+        for future, (_, tile_keys) in list(self._pending.items()):
+            if keys.isdisjoint(tile_keys) and future.cancel():
+                del self._pending[future]
+                self._pending_keys.difference_update(tile_keys)
+
+    def _shutdown_executor(self):
+        """
+        Stop the worker processes; the new ones are started on the next submit.
+        """
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _submit_tile(self, cells):
+        """
+        Start calculation of the tile, restarting the worker processes if they are broken.
+        :param cells: List of tuples: x_0, y_0, number of steps
+        """
+        if not self._executor:
+            self._executor = ProcessPoolExecutor()
+        try:
+            future = self._executor.submit(_sweep_tile, self._method_type, self._X, cells)
+        except BrokenProcessPool:
+            self._shutdown_executor()
+            self._executor = ProcessPoolExecutor()
+            future = self._executor.submit(_sweep_tile, self._method_type, self._X, cells)
+        keys = [self._key(cell) for cell in cells]
+        self._pending[future] = (self._executor, keys)
+        self._pending_keys.update(keys)
+
+    def _submit(self):
+        """
+        Start calculation of the cells of the current grid which are not calculated or being calculated yet.
+        """
+        breakpoints = get_breakpoints()
+        for row in self._cells():
+            tile = []
+            for cell in row:
+                if self._key(cell) in self._cache or self._key(cell) in self._pending_keys:
+                    continue
+                if cell[0] >= self._X or cell[0] in breakpoints:
+                    self._cache[self._key(cell)] = None
+                    continue
+                tile.append(cell)
+            for i in range(0, len(tile), SWEEP_TILE_SIZE):
+                self._submit_tile(tile[i:i + SWEEP_TILE_SIZE])
@@ -1,8 +1,9 @@
+import numpy as np
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtCore
 
 from given import x_0_DEFAULT, y_0_DEFAULT, X_DEFAULT, STEP_DEFAULT
-from utils import get_color
+from utils import get_color, ErrorPlotType
 
 WINDOW_NAME = 'Numerical method for differential equations solving - graphs'
 WINDOW_SIZE = 800, 600
@@ -10,10 +11,18 @@ EULER_BTN_TEXT = 'Draw Euler\'s method'
 IMPR_EULER_BTN_TEXT = 'Draw Improved Euler\'s method'
 RUNGE_KUTTA_BTN_TEXT = 'Draw Runge-Kutta method'
 ERROR_BTN_TEXT = 'Change error type'
+COMPARE_BTN_TEXT = 'Compare all methods'
+SWEEP_BTN_TEXT = 'Error sweep'
+RUNGE_KUTTA_3_8_BTN_TEXT = 'Draw Runge-Kutta 3/8-rule method'
+DORMAND_PRINCE_BTN_TEXT = 'Draw Dormand-Prince method'
+ADAMS_BASHFORTH_BTN_TEXT = 'Draw Adams-Bashforth method'
+ADAMS_MOULTON_BTN_TEXT = 'Draw Adams-Bashforth-Moulton method'
 LBL_x_0_TEXT = 'x_0:'
 LBL_y_0_TEXT = 'y_0:'
 LBL_X_TEXT = 'X:'
 LBL_step_TEXT = 'step:'
+ERROR_TITLE_TEXT = 'max: {:.3e} (x = {}), RMS: {:.3e}, L2: {:.3e}'
+ERROR_LEGEND_TEXT = '{} (max: {:.2e}, RMS: {:.2e})'
 EL_NAMES = [
     'plot_left',  # 0
     'plot_right',  # 1
@@ -28,7 +37,49 @@ EL_NAMES = [
     'euler_btn',  # 10
     'impr_euler_btn',  # 11
     'runge_kutta_btn',  # 12
-    'error_btn'  # 13
+    'error_btn',  # 13
+    'compare_btn',  # 14
+    'sweep_btn',  # 15
+    'runge_kutta_3_8_btn',  # 16
+    'dormand_prince_btn',  # 17
+    'adams_bashforth_btn',  # 18
+    'adams_moulton_btn'  # 19
+]
+SWEEP_WINDOW_NAME = 'Maximum error sweep'
+SWEEP_WINDOW_SIZE = 600, 600
+SWEEP_RUN_BTN_TEXT = 'Run sweep'
+SWEEP_REFINE_BTN_TEXT = 'Refine grid'
+LBL_method_TEXT = 'method:'
+LBL_parameter_TEXT = 'parameter:'
+LBL_from_TEXT = 'from:'
+LBL_to_TEXT = 'to:'
+LBL_resolution_TEXT = 'values:'
+LBL_max_steps_TEXT = 'max steps:'
+SWEEP_FROM_DEFAULT = '-2.0'
+SWEEP_TO_DEFAULT = '2.0'
+SWEEP_RESOLUTION_DEFAULT = '9'
+SWEEP_MAX_STEPS_DEFAULT = '50'
+SWEEP_PROGRESS_TEXT = '{} of {} cells'
+SWEEP_AXIS_LABEL = 'number of steps'
+SWEEP_TITLE_TEXT = 'log10 of maximum error'
+SWEEP_TIMER_INTERVAL = 200  # ms
+SWEEP_EL_NAMES = [
+    'sweep_plot',  # 0
+    'method_lbl',  # 1
+    'method_cmb',  # 2
+    'parameter_lbl',  # 3
+    'parameter_cmb',  # 4
+    'from_lbl',  # 5
+    'from_inp',  # 6
+    'to_lbl',  # 7
+    'to_inp',  # 8
+    'resolution_lbl',  # 9
+    'resolution_inp',  # 10
+    'max_steps_lbl',  # 11
+    'max_steps_inp',  # 12
+    'run_btn',  # 13
+    'refine_btn',  # 14
+    'progress_lbl'  # 15
 ]
 
 
@@ -73,6 +124,12 @@ class View(QtGui.QWidget):
         self.elements[EL_NAMES[11]] = QtGui.QPushButton(IMPR_EULER_BTN_TEXT)
         self.elements[EL_NAMES[12]] = QtGui.QPushButton(RUNGE_KUTTA_BTN_TEXT)
         self.elements[EL_NAMES[13]] = QtGui.QPushButton(ERROR_BTN_TEXT)
+        self.elements[EL_NAMES[14]] = QtGui.QPushButton(COMPARE_BTN_TEXT)
+        self.elements[EL_NAMES[15]] = QtGui.QPushButton(SWEEP_BTN_TEXT)
+        self.elements[EL_NAMES[16]] = QtGui.QPushButton(RUNGE_KUTTA_3_8_BTN_TEXT)
+        self.elements[EL_NAMES[17]] = QtGui.QPushButton(DORMAND_PRINCE_BTN_TEXT)
+        self.elements[EL_NAMES[18]] = QtGui.QPushButton(ADAMS_BASHFORTH_BTN_TEXT)
+        self.elements[EL_NAMES[19]] = QtGui.QPushButton(ADAMS_MOULTON_BTN_TEXT)
 
         # Adding of elements to the grid
         grid.addWidget(self.elements[EL_NAMES[0]], 0, 0, 1, 4)  # plot_left
@@ -89,6 +146,12 @@ class View(QtGui.QWidget):
         grid.addWidget(self.elements[EL_NAMES[11]], 2, 2, 1, 2)  # impr_euler_btn
         grid.addWidget(self.elements[EL_NAMES[12]], 2, 4, 1, 2)  # runge_kutta_btn
         grid.addWidget(self.elements[EL_NAMES[13]], 2, 6, 1, 2)  # error_btn
+        grid.addWidget(self.elements[EL_NAMES[14]], 3, 0, 1, 4)  # compare_btn
+        grid.addWidget(self.elements[EL_NAMES[15]], 3, 4, 1, 4)  # sweep_btn
+        grid.addWidget(self.elements[EL_NAMES[16]], 4, 0, 1, 2)  # runge_kutta_3_8_btn
+        grid.addWidget(self.elements[EL_NAMES[17]], 4, 2, 1, 2)  # dormand_prince_btn
+        grid.addWidget(self.elements[EL_NAMES[18]], 4, 4, 1, 2)  # adams_bashforth_btn
+        grid.addWidget(self.elements[EL_NAMES[19]], 4, 6, 1, 2)  # adams_moulton_btn
 
         # Subscribe controller to the window elements' actions
         self.elements[EL_NAMES[6]].textChanged.connect(self.controller.x_0_inp_changed)
@@ -99,6 +162,12 @@ class View(QtGui.QWidget):
         self.elements[EL_NAMES[11]].clicked.connect(self.controller.impr_euler_btn_pressed)
         self.elements[EL_NAMES[12]].clicked.connect(self.controller.runge_kutta_btn_pressed)
         self.elements[EL_NAMES[13]].clicked.connect(self.controller.error_btn_pressed)
+        self.elements[EL_NAMES[14]].clicked.connect(self.controller.compare_btn_pressed)
+        self.elements[EL_NAMES[15]].clicked.connect(self.controller.sweep_btn_pressed)
+        self.elements[EL_NAMES[16]].clicked.connect(self.controller.runge_kutta_3_8_btn_pressed)
+        self.elements[EL_NAMES[17]].clicked.connect(self.controller.dormand_prince_btn_pressed)
+        self.elements[EL_NAMES[18]].clicked.connect(self.controller.adams_bashforth_btn_pressed)
+        self.elements[EL_NAMES[19]].clicked.connect(self.controller.adams_moulton_btn_pressed)
 
         self.show()
 
@@ -110,23 +179,49 @@ class View(QtGui.QWidget):
         exact_plot = self.model.exact_plot
         if exact_plot:
             plots.append(exact_plot)
-        method_plot = self.model.method_plot
-        if method_plot:
-            plots.append(method_plot)
-        self.update_graph_widget(self.elements[EL_NAMES[0]], plots)
-
-        error_plot = self.model.error_plot
-        if error_plot:
-            self.update_graph_widget(self.elements[EL_NAMES[1]], [error_plot])
-        else:
-            self.update_graph_widget(self.elements[EL_NAMES[1]], [])
-
-    def update_graph_widget(self, graph_widget, plots):
+        plots += self.model.method_plots
+        self.update_graph_widget(self.elements[EL_NAMES[0]], plots, get_color())
+
+        # Metrics describe the error by x at the current step, so they are shown only with that error plot
+        methods_metrics = []
+        if self.model.error_type is ErrorPlotType.by_x:
+            methods_metrics = self.model.methods_error_metrics
+
+        # Errors of compared methods differ by orders of magnitude, so they are shown in log scale
+        # (without zero errors) and each method's metrics are shown in the legend
+        error_plots = self.model.error_plots
+        compared = len(error_plots) > 1
+        if compared:
+            error_plots = [
+                [[x for x, err in zip(xs, errs) if err], [err for err in errs if err], name]
+                for xs, errs, name in error_plots
+            ]
+            for error_plot, method_plot, metrics in zip(error_plots, self.model.method_plots, methods_metrics):
+                error_plot[2] = ERROR_LEGEND_TEXT.format(method_plot[2], float(metrics.max), float(metrics.rms))
+        self.elements[EL_NAMES[1]].setLogMode(y=compared)
+
+        # Error plots are colored the same as the corresponding methods' plots
+        colors = get_color()
+        if exact_plot:
+            next(colors)
+        self.update_graph_widget(self.elements[EL_NAMES[1]], error_plots, colors)
+
+        self.elements[EL_NAMES[1]].setTitle(None)
+        if len(methods_metrics) == 1:
+            metrics = methods_metrics[0]
+            self.elements[EL_NAMES[1]].setTitle(ERROR_TITLE_TEXT.format(
+                float(metrics.max), metrics.argmax, float(metrics.rms), float(metrics.l2)
+            ))
+
+    def update_graph_widget(self, graph_widget, plots, colors=None):
         """
         Clear the graph widget and add plots into it.
         :param graph_widget: Widget to clear and update
         :param plots: Iterable containing plots (lists with x's, y's and name)
+        :param colors: Iterator of colors for the plots; if None - colors continue cycling between updates
         """
+        if colors is None:
+            colors = self._color_iter
         graph_widget.getViewBox().removeItem(graph_widget.plotItem.legend)
         graph_widget.clear()
         graph_widget.addLegend()
@@ -134,7 +229,7 @@ class View(QtGui.QWidget):
             graph_widget.plot(x=[float(x) for x in plot_data[0]],
                               y=[float(y) for y in plot_data[1]],
                               name=plot_data[2],
-                              pen=self._color_iter.__next__())
+                              pen=next(colors))
 
     def set_inputs_color(self, color_code, *input_field_names):
         """
@@ -144,3 +239,114 @@ class View(QtGui.QWidget):
         """
         for field_name in input_field_names:
             self.elements[field_name].setStyleSheet('QLineEdit {background-color: #%s}' % color_code)
+
+
+class SweepView(QtGui.QWidget):
+    """
+    View of the maximum error of a method over the grid of (number of steps, x_0) or (number of steps, y_0).
+    """
+    def __init__(self, model, controller, method_names, parameters):
+        """
+        :param model: Sweep model of MVC
+        :param controller: Controller module of MVC
+        :param method_names: Names of the methods to choose from
+        :param parameters: Names of the parameters to choose from
+        """
+        super().__init__(windowTitle=SWEEP_WINDOW_NAME)
+
+        self.model = model
+        self.controller = controller
+        self.elements = {}
+        self._image = pg.ImageItem()
+
+        # Subscribe on MVC model changes
+        model.add_observer(self)
+
+        # Default window properties
+        self.resize(SWEEP_WINDOW_SIZE[0], SWEEP_WINDOW_SIZE[1])
+        grid = QtGui.QGridLayout()
+        self.setLayout(grid)
+
+        # Grid elements' initialization
+        self.elements[SWEEP_EL_NAMES[0]] = pg.PlotWidget(self, name=SWEEP_EL_NAMES[0], title=SWEEP_TITLE_TEXT)
+        self.elements[SWEEP_EL_NAMES[1]] = QtGui.QLabel(LBL_method_TEXT)
+        self.elements[SWEEP_EL_NAMES[2]] = QtGui.QComboBox()
+        self.elements[SWEEP_EL_NAMES[3]] = QtGui.QLabel(LBL_parameter_TEXT)
+        self.elements[SWEEP_EL_NAMES[4]] = QtGui.QComboBox()
+        self.elements[SWEEP_EL_NAMES[5]] = QtGui.QLabel(LBL_from_TEXT)
+        self.elements[SWEEP_EL_NAMES[6]] = QtGui.QLineEdit(SWEEP_FROM_DEFAULT)
+        self.elements[SWEEP_EL_NAMES[7]] = QtGui.QLabel(LBL_to_TEXT)
+        self.elements[SWEEP_EL_NAMES[8]] = QtGui.QLineEdit(SWEEP_TO_DEFAULT)
+        self.elements[SWEEP_EL_NAMES[9]] = QtGui.QLabel(LBL_resolution_TEXT)
+        self.elements[SWEEP_EL_NAMES[10]] = QtGui.QLineEdit(SWEEP_RESOLUTION_DEFAULT)
+        self.elements[SWEEP_EL_NAMES[11]] = QtGui.QLabel(LBL_max_steps_TEXT)
+        self.elements[SWEEP_EL_NAMES[12]] = QtGui.QLineEdit(SWEEP_MAX_STEPS_DEFAULT)
+        self.elements[SWEEP_EL_NAMES[13]] = QtGui.QPushButton(SWEEP_RUN_BTN_TEXT)
+        self.elements[SWEEP_EL_NAMES[14]] = QtGui.QPushButton(SWEEP_REFINE_BTN_TEXT)
+        self.elements[SWEEP_EL_NAMES[15]] = QtGui.QLabel()
+
+        self.elements[SWEEP_EL_NAMES[2]].addItems(method_names)
+        self.elements[SWEEP_EL_NAMES[4]].addItems(parameters)
+        self.elements[SWEEP_EL_NAMES[0]].addItem(self._image)
+        self.elements[SWEEP_EL_NAMES[0]].setLabel('bottom', SWEEP_AXIS_LABEL)
+
+        # Adding of elements to the grid
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[0]], 0, 0, 1, 4)  # sweep_plot
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[1]], 1, 0)  # method_lbl
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[2]], 1, 1)  # method_cmb
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[3]], 1, 2)  # parameter_lbl
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[4]], 1, 3)  # parameter_cmb
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[5]], 2, 0)  # from_lbl
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[6]], 2, 1)  # from_inp
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[7]], 2, 2)  # to_lbl
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[8]], 2, 3)  # to_inp
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[9]], 3, 0)  # resolution_lbl
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[10]], 3, 1)  # resolution_inp
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[11]], 3, 2)  # max_steps_lbl
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[12]], 3, 3)  # max_steps_inp
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[13]], 4, 0, 1, 2)  # run_btn
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[14]], 4, 2, 1, 2)  # refine_btn
+        grid.addWidget(self.elements[SWEEP_EL_NAMES[15]], 5, 0, 1, 4)  # progress_lbl
+
+        # Subscribe controller to the window elements' actions
+        self.elements[SWEEP_EL_NAMES[13]].clicked.connect(self.controller.sweep_run_btn_pressed)
+        self.elements[SWEEP_EL_NAMES[14]].clicked.connect(self.controller.sweep_refine_btn_pressed)
+
+        # Finished tiles of the sweep are collected periodically to be drawn progressively
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.model.collect)
+        self._timer.start(SWEEP_TIMER_INTERVAL)
+
+    def model_has_changed(self):
+        """
+        Reload the heatmap according to the new state of the model.
+        """
+        done, total = self.model.progress
+        self.elements[SWEEP_EL_NAMES[15]].setText(SWEEP_PROGRESS_TEXT.format(done, total))
+        self.elements[SWEEP_EL_NAMES[0]].setLabel('left', self.model.parameter)
+
+        values = self.model.values
+        ns = self.model.ns
+        if not values or not ns:
+            return
+
+        # Image is indexed as [x, y]: number of steps by x axis, parameter value by y axis
+        errors = np.array([
+            [np.nan if err is None else float(err) for err in row]
+            for row in self.model.errors
+        ]).T
+
+        # Exact zero errors are shown as the smallest positive ones, not as missing cells
+        positive = errors[errors > 0]
+        errors[errors == 0] = positive.min() if positive.size else 1.0
+        errors = np.log10(errors)
+        levels = (0, 1)
+        if not np.isnan(errors).all():
+            levels = (np.nanmin(errors), np.nanmax(errors))
+        self._image.setImage(errors, levels=levels)
+
+        height = float(values[-1] - values[0]) if len(values) > 1 else 1.0
+        cell_height = height / (len(values) - 1) if len(values) > 1 else 1.0
+        self._image.setRect(QtCore.QRectF(
+            ns[0] - 0.5, float(values[0]) - cell_height / 2, len(ns), height + cell_height
+        ))
@@ -5,7 +5,9 @@
 
 # from fractions import Fraction as Rational
 from decimal import Decimal as Rational
+from collections import namedtuple
 from enum import Enum
+from math import sqrt
 
 from given import f, y, c, y_ivp, x_0_DEFAULT, y_0_DEFAULT
 
@@ -22,12 +24,19 @@ COLORS = [
 FLOAT_REGEXP = r'^(-?)(0|([1-9][0-9]*))(\.[0-9]+)?$'
 MAX_STEPS_NUMBER = 100
 
+ErrorMetrics = namedtuple('ErrorMetrics', ['max', 'argmax', 'rms', 'l2', 'segments'])
+ButcherTableau = namedtuple('ButcherTableau', ['a', 'b', 'c'])
+
 
 class PlotType(Enum):
     exact = 0
     euler = 1
     impr_euler = 2
     runge_kutta = 3
+    runge_kutta_3_8 = 4
+    dormand_prince = 5
+    adams_bashforth = 6
+    adams_moulton = 7
 
 
 class ErrorPlotType(Enum):
@@ -55,100 +64,327 @@ def rational_range(start, stop=None, step=Rational(1)):
         start += step
 
 
-def exact(x_0, y_0, start, end, step):
+def segments(breakpoints, x_0, X, step):
+    """
+    Split the range [x_0, X] into parts not containing the breakpoints.
+    :param breakpoints: Breakpoints of the function lying strictly between x_0 and X
+    :param x_0: First x value of the range
+    :param X: Last x value of the range
+    :param step: Frequency step (dx) - how far from a breakpoint the parts end
+    :return: List of tuples: start x value, end x value
+    """
+    parts = []
+    last_break = x_0
+    for bkpt in breakpoints:
+        parts.append((last_break, bkpt - step))
+        last_break = bkpt + step
+    parts.append((last_break, X))
+    return parts
+
+
+def exact_function(x_0, y_0):
     """
-    Exact solution of the equation y' = f(x, y)
-    with IVP for given y(x_0) = y_0 for x in [x_0, X].
+    Exact solution y(x) of the equation y' = f(x, y) with IVP for given y(x_0) = y_0.
     :param x_0: x value if IVP
     :param y_0: y value for the corresponding x_0 value
-    :param start: Start x value
-    :param end: Last x value
-    :param step: Frequency step (dx) - how often x is counted
-    :return: Tuple: x values, y values
+    :return: Function of x returning the y value of the exact solution
     """
-    xs = []
-    ys = []
     if x_0 == x_0_DEFAULT and y_0 == y_0_DEFAULT:
-        for x in rational_range(start, end + step, step):
-            xs.append(x)
-            ys.append(y_ivp(x))
-    else:
-        cur_c = c(x_0, y_0)
-        for x in rational_range(start, end + step, step):
-            xs.append(x)
-            ys.append(y(x, cur_c))
-    return xs, ys
+        return y_ivp
+    cur_c = c(x_0, y_0)
+    return lambda x: y(x, cur_c)
 
 
-def euler(x_0, y_0, start, end, step):
+def initial_value(x_0, y_0, start):
     """
-    Solution of the equation y' = f(x, y) using Euler's method
-    with IVP for given y(x_0) = y_0 for x in [x_0, X].
+    Value of the exact solution at the start of the calculating range.
     :param x_0: x value if IVP
     :param y_0: y value for the corresponding x_0 value
     :param start: Start x value
-    :param end: Last x value
-    :param step: Frequency step (dx) - how often x is counted
-    :return: Tuple: x values, y values
-    """
-    xs = [x_0]
-    ys = [y_0]
-    if start != x_0:
-        xs = [start]
-        ys = [y(start, c(x_0, y_0))]
-    for i, x in enumerate(rational_range(start + step, end + step, step)):
-        xs.append(x)
-        ys.append(ys[i] + (x - xs[i]) * f(xs[i], ys[i]))
-    return xs, ys
+    :return: y value at start
+    """
+    if start == x_0:
+        return y_0
+    return y(start, c(x_0, y_0))
+
+
+def euler_step(x, y, step):
+    """
+    One step of Euler's method.
+    :param x: Current x value
+    :param y: Current y value
+    :param step: Step size (dx)
+    :return: y value at x + step
+    """
+    return y + step * f(x, y)
+
+
+def euler_improved_step(x, y, step):
+    """
+    One step of Improved Euler's method.
+    :param x: Current x value
+    :param y: Current y value
+    :param step: Step size (dx)
+    :return: y value at x + step
+    """
+    k1 = f(x, y)
+    y_pred = y + step * k1
+    return y + step * (k1 + f(x + step, y_pred)) / 2
+
+
+def _coefficients(*values):
+    """
+    Convert coefficients written as strings (for example '1/6') into Rational numbers.
+    :param values: Coefficients strings
+    :return: List of Rational coefficients
+    """
+    result = []
+    for value in values:
+        num, _, den = value.partition('/')
+        result.append(Rational(num) / Rational(den or '1'))
+    return result
+
+
+RK4_TABLEAU = ButcherTableau(
+    a=[
+        [],
+        _coefficients('1/2'),
+        _coefficients('0', '1/2'),
+        _coefficients('0', '0', '1')
+    ],
+    b=_coefficients('1/6', '1/3', '1/3', '1/6'),
+    c=_coefficients('0', '1/2', '1/2', '1')
+)
+RK_3_8_TABLEAU = ButcherTableau(
+    a=[
+        [],
+        _coefficients('1/3'),
+        _coefficients('-1/3', '1'),
+        _coefficients('1', '-1', '1')
+    ],
+    b=_coefficients('1/8', '3/8', '3/8', '1/8'),
+    c=_coefficients('0', '1/3', '2/3', '1')
+)
+# Fifth-order solution of Dormand-Prince method; the last stage is the first one of the next step (FSAL)
+DORMAND_PRINCE_TABLEAU = ButcherTableau(
+    a=[
+        [],
+        _coefficients('1/5'),
+        _coefficients('3/40', '9/40'),
+        _coefficients('44/45', '-56/15', '32/9'),
+        _coefficients('19372/6561', '-25360/2187', '64448/6561', '-212/729'),
+        _coefficients('9017/3168', '-355/33', '46732/5247', '49/176', '-5103/18656'),
+        _coefficients('35/384', '0', '500/1113', '125/192', '-2187/6784', '11/84')
+    ],
+    b=_coefficients('35/384', '0', '500/1113', '125/192', '-2187/6784', '11/84', '0'),
+    c=_coefficients('0', '1/5', '3/10', '4/5', '8/9', '1', '1')
+)
+# Coefficients of f values starting from the latest one
+ADAMS_BASHFORTH_COEFFICIENTS = {
+    1: _coefficients('1'),
+    2: _coefficients('3/2', '-1/2'),
+    3: _coefficients('23/12', '-16/12', '5/12'),
+    4: _coefficients('55/24', '-59/24', '37/24', '-9/24'),
+    5: _coefficients('1901/720', '-2774/720', '2616/720', '-1274/720', '251/720')
+}
+# Coefficients of f values starting from the predicted one at the next x value
+ADAMS_MOULTON_COEFFICIENTS = {
+    1: _coefficients('1'),
+    2: _coefficients('1/2', '1/2'),
+    3: _coefficients('5/12', '8/12', '-1/12'),
+    4: _coefficients('9/24', '19/24', '-5/24', '1/24'),
+    5: _coefficients('251/720', '646/720', '-264/720', '106/720', '-19/720')
+}
+
+
+def _compile_tableau(tableau, fsal):
+    """
+    Generate the step function of explicit Runge-Kutta method as straight-line code without zero terms,
+    so that it is as fast as the hand-written one.
+    :param tableau: ButcherTableau of the method
+    :param fsal: Whether the last stage is reused as the first stage of the next step
+    :return: Function without arguments returning a new step function (x, y, step) -> next y value
+    """
+    a, b, c = tableau
+
+    def combination(name, coefficients, prefix):
+        terms = []
+        for j, coefficient in enumerate(coefficients):
+            if coefficient == 1:
+                terms.append('k{}'.format(j))
+            elif coefficient:
+                terms.append('{}{}_{} * k{}'.format(prefix, name, j, j))
+        return ' + '.join(terms)
+
+    lines = ['def factory(a, b, c):']
+    for i in range(1, len(c)):
+        lines.append('    c{0} = c[{0}]'.format(i))
+        lines += ['    a{0}_{1} = a[{0}][{1}]'.format(i, j) for j, a_ij in enumerate(a[i]) if a_ij and a_ij != 1]
+    lines += ['    b_{0} = b[{0}]'.format(j) for j, b_j in enumerate(b) if b_j and b_j != 1]
+    lines += ['    def make_step():']
+    if fsal:
+        lines += ['        last = None']
+    lines += ['        def step(x, y, h):']
+    if fsal:
+        lines += [
+            '            nonlocal last',
+            '            if last is not None and last[0] == x and last[1] == y:',
+            '                k0 = last[2]',
+            '            else:',
+            '                k0 = f(x, y)'
+        ]
+    else:
+        lines += ['            k0 = f(x, y)']
+    for i in range(1, len(c)):
+        x_i = 'x + h' if c[i] == 1 else 'x + c{} * h'.format(i)
+        lines.append('            k{} = f({}, y + h * ({}))'.format(i, x_i, combination(i, a[i], 'a')))
+    lines.append('            next_y = y + h * ({})'.format(combination('', b, 'b')))
+    if fsal:
+        lines.append('            last = (x + h, next_y, k{})'.format(len(c) - 1))
+    lines += [
+        '            return next_y',
+        '        return step',
+        '    return make_step'
+    ]
+
+    # Module globals are used, so f is looked up at call time as in the other steps
+    namespace = {}
+    exec('\n'.join(lines), globals(), namespace)
+    return namespace['factory'](a, b, c)
+
+
+class ExplicitRungeKutta:
+    """
+    Explicit Runge-Kutta method given by its Butcher tableau.
+    If the last stage is calculated at the next point (FSAL), it is reused as the first stage of the next step.
+    """
+    def __init__(self, tableau):
+        """
+        :param tableau: ButcherTableau of the method
+        """
+        self.tableau = tableau
+        self.fsal = tableau.c[-1] == 1 and tableau.a[-1] == tableau.b[:-1] and not tableau.b[-1]
+        self._make_step = _compile_tableau(tableau, self.fsal)
+
+    def start(self):
+        """
+        Step function for one solution (with its own last stage for FSAL).
+        :return: Function (x, y, step) -> next y value
+        """
+        return self._make_step()
+
+
+class AdamsMethod:
+    """
+    Adams-Bashforth method or Adams-Bashforth-Moulton predictor-corrector (PECE).
+    f values of the previous steps are reused while the steps go one by one with the same step size,
+    so each step needs one (Adams-Bashforth) or two (with Adams-Moulton corrector) new f evaluations.
+    First steps are made by Runge-Kutta method (RK4).
+    """
+    def __init__(self, order, corrector=False):
+        """
+        :param order: Order of the method (number of previous f values used by the predictor)
+        :param corrector: Whether to correct the prediction by Adams-Moulton method of the same order
+        """
+        assert order in ADAMS_BASHFORTH_COEFFICIENTS
+        self.order = order
+        self.corrector = corrector
+
+    def start(self):
+        """
+        Step function for one solution (with its own f values of the previous steps).
+        :return: Function (x, y, step) -> next y value
+        """
+        order = self.order
+        predictor = ADAMS_BASHFORTH_COEFFICIENTS[order]
+        corrector = ADAMS_MOULTON_COEFFICIENTS[order] if self.corrector else None
+        starter = runge_kutta_step.start()
+        fs = []
+        expected = None
 
+        def step(x, y, h):
+            nonlocal fs, expected
+            if expected != (x, y, h):
+                fs = [f(x, y)]
 
-def euler_improved(x_0, y_0, start, end, step):
+            if len(fs) < order:
+                next_y = starter(x, y, h)
+            else:
+                next_y = y + h * sum(b * f_i for b, f_i in zip(predictor, fs))
+                if corrector:
+                    next_f = f(x + h, next_y)
+                    next_y = y + h * (corrector[0] * next_f + sum(b * f_i for b, f_i in zip(corrector[1:], fs)))
+
+            fs = [f(x + h, next_y)] + fs[:order - 1]
+            expected = (x + h, next_y, h)
+            return next_y
+        return step
+
+
+runge_kutta_step = ExplicitRungeKutta(RK4_TABLEAU)
+runge_kutta_3_8_step = ExplicitRungeKutta(RK_3_8_TABLEAU)
+dormand_prince_step = ExplicitRungeKutta(DORMAND_PRINCE_TABLEAU)
+adams_bashforth_step = AdamsMethod(4)
+adams_moulton_step = AdamsMethod(4, corrector=True)
+
+
+def start_method(step_func):
+    """
+    Get step function for one solution: methods keeping data between the steps give a new one each time.
+    :param step_func: Function (x, y, step) -> next y value or method object with start() returning it
+    :return: Function (x, y, step) -> next y value
     """
-    Solution of the equation y' = f(x, y) using Improved Euler's method
-    with IVP for given y(x_0) = y_0 for x in [x_0, X].
+    if hasattr(step_func, 'start'):
+        return step_func.start()
+    return step_func
+
+
+def iter_solution(step_func, x_0, y_0, start, end, step):
+    """
+    Lazily solve the equation y' = f(x, y) by the given one-step method
+    with IVP for given y(x_0) = y_0 for x in [start, end].
+    :param step_func: Function (x, y, step) -> next y value of the method or method object (see start_method)
     :param x_0: x value if IVP
     :param y_0: y value for the corresponding x_0 value
     :param start: Start x value
     :param end: Last x value
     :param step: Frequency step (dx) - how often x is counted
-    :return: Tuple: x values, y values
-    """
-    xs = [x_0]
-    ys = [y_0]
-    if start != x_0:
-        xs = [start]
-        ys = [y(start, c(x_0, y_0))]
-    for i, x in enumerate(rational_range(start + step, end + step, step)):
-        xs.append(x)
-        y_pred = ys[i] + (x - xs[i]) * f(xs[i], ys[i])
-        ys.append(ys[i] + (x - xs[i]) * (f(xs[i], ys[i]) + f(x, y_pred)) / 2)
-    return xs, ys
+    :return: Tuple: next x value, y value of the method's solution at it
+    """
+    step_func = start_method(step_func)
+    x = start
+    cur_y = initial_value(x_0, y_0, start)
+    yield x, cur_y
+    for next_x in rational_range(start + step, end + step, step):
+        cur_y = step_func(x, cur_y, step)
+        x = next_x
+        yield x, cur_y
 
 
-def runge_kutta(x_0, y_0, start, end, step):
+def solve_together(step_funcs, x_0, y_0, start, end, step):
     """
-    Solution of the equation y' = f(x, y) using Runge-Kutta method (RK4, fourth-order)
-    with IVP for given y(x_0) = y_0 for x in [x_0, X].
+    Solve the equation y' = f(x, y) by several one-step methods at once on the shared grid
+    with IVP for given y(x_0) = y_0 for x in [start, end].
+    The grid and the exact solution are calculated only once for all the methods.
+    :param step_funcs: Functions (x, y, step) -> next y value of the methods or method objects (see start_method)
     :param x_0: x value if IVP
     :param y_0: y value for the corresponding x_0 value
     :param start: Start x value
     :param end: Last x value
     :param step: Frequency step (dx) - how often x is counted
-    :return: Tuple: x values, y values
-    """
-    xs = [x_0]
-    ys = [y_0]
-    if start != x_0:
-        xs = [start]
-        ys = [y(start, c(x_0, y_0))]
-    for i, x in enumerate(rational_range(start + step, end + step, step)):
+    :return: Tuple: x values, exact y values, list of y values for each method
+    """
+    exact_func = exact_function(x_0, y_0)
+    xs = []
+    exact_ys = []
+    methods_ys = [[] for _ in step_funcs]
+    solutions = [iter_solution(step_func, x_0, y_0, start, end, step) for step_func in step_funcs]
+    for x in rational_range(start, end + step, step):
         xs.append(x)
-        k1 = f(xs[i], ys[i])
-        k2 = f(xs[i] + step / 2, ys[i] + step * k1 / 2)
-        k3 = f(xs[i] + step / 2, ys[i] + step * k2 / 2)
-        k4 = f(xs[i] + step, ys[i] + step * k3)
-        ys.append(ys[i] + step * (k1 + 2 * k2 + 2 * k3 + k4) / 6)
-    return xs, ys
+        exact_ys.append(exact_func(x))
+        for ys, solution in zip(methods_ys, solutions):
+            ys.append(next(solution)[1])
+    return xs, exact_ys, methods_ys
 
 
 def error_between(ys1, ys2):
@@ -161,41 +397,125 @@ def error_between(ys1, ys2):
     return [abs(y1 - y2) for y1, y2 in zip(ys1, ys2)]
 
 
-def max_errors(func1, func2, breakpoints, x_0, y_0, X, max_steps_number=MAX_STEPS_NUMBER):
+def _sqrt(value):
+    """
+    Square root keeping the Rational type if possible.
+    :param value: Non-negative number
+    :return: Square root of the value
+    """
+    if hasattr(value, 'sqrt'):
+        return value.sqrt()
+    return sqrt(value)
+
+
+class ErrorAccumulator:
+    """
+    Running max, x value of max, sum of squares and max by parts of the error values of one method.
+    """
+    def __init__(self):
+        self._max_err = 0
+        self._argmax = None
+        self._sq_sum = 0
+        self._count = 0
+        self._parts = []
+
+    def start_part(self, start, end):
+        """
+        Start the next part of the range between the breakpoints.
+        :param start: Start x value of the part
+        :param end: End x value of the part
+        """
+        self._parts.append([start, end, 0])
+
+    def add(self, x, err):
+        """
+        Take into account the error value.
+        :param x: x value of the error
+        :param err: Absolute error value at x
+        """
+        self._sq_sum += err * err
+        self._count += 1
+        part = self._parts[-1]
+        if err > part[2]:
+            part[2] = err
+        if self._argmax is None or err > self._max_err:
+            self._max_err = err
+            self._argmax = x
+
+    def result(self, step):
+        """
+        Metrics of all the error values taken into account.
+        :param step: Frequency step (dx) - how often x is counted
+        :return: ErrorMetrics (see error_metrics)
+        """
+        rms = _sqrt(self._sq_sum / self._count) if self._count else 0
+        return ErrorMetrics(
+            self._max_err, self._argmax, rms, _sqrt(self._sq_sum * step), [tuple(part) for part in self._parts]
+        )
+
+
+def compare_error_metrics(step_funcs, breakpoints, x_0, y_0, X, step):
+    """
+    Calculate errors of several methods' solutions comparably to the exact solution in one pass
+    on the shared grid without storing the solutions themselves.
+    :param step_funcs: Functions (x, y, step) -> next y value of the methods or method objects (see start_method)
+    :param breakpoints: Set of breakpoints of functions on the x axis
+    :param x_0: x value of IVP
+    :param y_0: y value for the corresponding x_0 value
+    :param X: Last x value of calculating range of functions
+    :param step: Frequency step (dx) - how often x is counted
+    :return: List of ErrorMetrics for each method (see error_metrics)
+    """
+    exact_func = exact_function(x_0, y_0)
+    accumulators = [ErrorAccumulator() for _ in step_funcs]
+
+    for start, end in segments(breakpoints, x_0, X, step):
+        for accumulator in accumulators:
+            accumulator.start_part(start, end)
+        solutions = [iter_solution(step_func, x_0, y_0, start, end, step) for step_func in step_funcs]
+        for x in rational_range(start, end + step, step):
+            exact_y = exact_func(x)
+            for accumulator, solution in zip(accumulators, solutions):
+                accumulator.add(x, abs(exact_y - next(solution)[1]))
+
+    return [accumulator.result(step) for accumulator in accumulators]
+
+
+def error_metrics(step_func, breakpoints, x_0, y_0, X, step):
+    """
+    Calculate errors of the method's solution comparably to the exact solution in one pass
+    without storing the solutions themselves.
+    :param step_func: Function (x, y, step) -> next y value of the method or method object (see start_method)
+    :param breakpoints: Set of breakpoints of functions on the x axis
+    :param x_0: x value of IVP
+    :param y_0: y value for the corresponding x_0 value
+    :param X: Last x value of calculating range of functions
+    :param step: Frequency step (dx) - how often x is counted
+    :return: ErrorMetrics: max error, x value of max error, RMS error, discrete L2 norm of error,
+             list of tuples (start x value, end x value, max error) for each part between breakpoints
+    """
+    return compare_error_metrics([step_func], breakpoints, x_0, y_0, X, step)[0]
+
+
+def compare_max_errors(step_funcs, breakpoints, x_0, y_0, X, max_steps_number=MAX_STEPS_NUMBER):
     """
-    Calculate max error values of two functions for different step sizes.
-    :param func1: Original function
-    :param func2: Function with some error comparing to the original one
+    Calculate max error values of several methods comparably to the exact solution for different step sizes.
+    :param step_funcs: Functions (x, y, step) -> next y value of the methods or method objects (see start_method)
     :param breakpoints: Set of breakpoints of functions on the x axis
     :param x_0: x value of IVP
     :param y_0: y value for the corresponding x_0 value
     :param X: Last x value of calculating range of functions
     :param max_steps_number: Number of steps for the very last calculation
-    :return: Tuple: n values (number of steps), y values (max error for n)
+    :return: Tuple: n values (number of steps), list of y values (max error for n) for each method
     """
     ns = []
-    max_err_values = []
+    max_err_values = [[] for _ in step_funcs]
     for n in range(1, int(max_steps_number) + 1):
         ns.append(n)
         cur_step = Rational(str((X - x_0) / n))
-        errors = []
-        last_break = x_0
-
-        # Find errors between breakpoints
-        for bkpt in breakpoints:
-            errors += error_between(
-                func1(x_0, y_0, last_break, bkpt - cur_step, cur_step)[1],
-                func2(x_0, y_0, last_break, bkpt - cur_step, cur_step)[1]
-            )
-            last_break = bkpt + cur_step
-
-        # Find errors after the last breakpoint
-        errors += error_between(
-            func1(x_0, y_0, last_break, X, cur_step)[1],
-            func2(x_0, y_0, last_break, X, cur_step)[1]
-        )
-
-        max_err_values.append(max(errors))
+        metrics = compare_error_metrics(step_funcs, breakpoints, x_0, y_0, X, cur_step)
+        for values, method_metrics in zip(max_err_values, metrics):
+            values.append(method_metrics.max)
 
     return ns, max_err_values
 